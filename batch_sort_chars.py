@@ -15,12 +15,17 @@ License: MIT
 
 Dependencies:
     - Pillow (PIL)
+    - NumPy
+    - sort_characters.py (render_char_cell, in this directory)
     - json (standard library)
 """
 
 import json
+import mmap
 import os
-from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+from PIL import Image, ImageFont
+from sort_characters import render_char_cell
 
 FONTS = {
     "menlo": "/System/Library/Fonts/Menlo.ttc",
@@ -33,44 +38,57 @@ OUTPUT_DIR = "/Users/adelinesetiawan/ASCII-dome"
 FONT_NAME = "menlo"
 FONT_SIZE = 30
 
+# Printable ASCII characters other than space (codes 33-126)
+PRINTABLE_ASCII = frozenset(chr(i) for i in range(33, 128) if chr(i).isprintable())
 
-def get_char_brightness(char, font, size=50):
+# Brightness per (char, font_path, font_size, font_index), shared across files
+_BRIGHTNESS_CACHE = {}
+
+
+def measure_chars_brightness(chars, font, size=50, grid_cols=16):
     """
-    Render character and return average brightness value.
+    Render many characters into one grid image and return their brightness.
     
-    Renders a character on a grayscale image, centers it, and calculates
-    the average pixel brightness. Used for sorting characters by visual weight.
+    Each character is rendered into its own clipped size x size cell by
+    sort_characters.render_char_cell, so both tools rank characters the same
+    way and an oversized glyph cannot spill into its neighbours. The cells are
+    pasted into one grid image so the per-cell averages come from a single
+    vectorized reduction.
     
     Args:
-        char (str): Single character to measure
+        chars (list): Characters to measure
         font (ImageFont): PIL ImageFont object for rendering
-        size (int): Image size for rendering (default: 50)
+        size (int): Cell size for rendering each character (default: 50)
+        grid_cols (int): Number of cells per grid row (default: 16)
         
     Returns:
-        float: Average brightness value (0.0 = black, 255.0 = white)
+        numpy.ndarray: Average brightness per character, in input order
     """
-    img = Image.new('L', (size, size), color=0)
-    draw = ImageDraw.Draw(img)
-    try:
-        bbox = draw.textbbox((0, 0), char, font=font)
-        char_width = bbox[2] - bbox[0]
-        char_height = bbox[3] - bbox[1]
-        x = (size - char_width) // 2 - bbox[0]
-        y = (size - char_height) // 2 - bbox[1]
-        draw.text((x, y), char, font=font, fill=255)
-    except:
-        return 0
-    pixels = list(img.getdata())
-    return sum(pixels) / len(pixels)
+    if not chars:
+        return np.zeros(0)
+    cols = min(grid_cols, len(chars))
+    rows = -(-len(chars) // cols)
+    grid = Image.new('L', (cols * size, rows * size), color=0)
+    for i, char in enumerate(chars):
+        row, col = divmod(i, cols)
+        try:
+            cell = render_char_cell(char, font, size)
+        except:
+            continue  # Unrenderable characters leave their cell black (0)
+        grid.paste(cell, (col * size, row * size))
+    cells = np.asarray(grid, dtype=np.uint8).reshape(rows, size, cols, size)
+    return cells.mean(axis=(1, 3)).ravel()[:len(chars)]
 
 
 def extract_chars_from_file(filepath):
     """
     Extract unique printable characters from a text or JSON file.
     
-    Reads file content and extracts all unique printable ASCII characters.
-    Always includes space character at the start (darkest character).
-    Filters to printable characters with ASCII codes < 128.
+    Memory-maps the file and counts byte values in NumPy, so large files are
+    never decoded into a Python string. Always includes space character at
+    the start (darkest character). Filters to printable characters with
+    ASCII codes < 128; bytes of multi-byte UTF-8 sequences are all >= 128,
+    so they are dropped exactly as before.
     
     Args:
         filepath (str): Path to text or JSON file
@@ -78,14 +96,14 @@ def extract_chars_from_file(filepath):
     Returns:
         list: List of unique characters, with space first
     """
-    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-        content = f.read()
+    with open(filepath, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return [' ']
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            present = np.flatnonzero(np.bincount(np.frombuffer(mm, dtype=np.uint8), minlength=256))
 
     # Get unique characters, filter to printable ASCII + common punctuation
-    chars = set()
-    for c in content:
-        if c.isprintable() and c != ' ' and ord(c) < 128:
-            chars.add(c)
+    chars = {chr(b) for b in present} & PRINTABLE_ASCII
 
     # Always include space at the start (darkest)
     return [' '] + list(chars)
@@ -98,6 +116,9 @@ def sort_chars_by_brightness(chars, font):
     Measures the brightness of each character when rendered with the given font
     and sorts them from darkest (lowest brightness) to brightest (highest brightness).
     Space character is always placed first (brightness = 0).
+    Measurements are cached per (char, font path, font size), so repeated
+    calls across files only render characters not seen before. Uncached
+    characters are measured together in a single grid render.
     
     Args:
         chars (list): List of characters to sort
@@ -106,16 +127,16 @@ def sort_chars_by_brightness(chars, font):
     Returns:
         list: Characters sorted from darkest to brightest
     """
-    char_brightness = []
-    for char in chars:
-        if char == ' ':
-            char_brightness.append((char, 0))  # Space is always darkest
-        else:
-            brightness = get_char_brightness(char, font)
-            char_brightness.append((char, brightness))
+    font_key = (font.path, font.size, font.index)
+    missing = [c for c in dict.fromkeys(chars)
+               if c != ' ' and (c,) + font_key not in _BRIGHTNESS_CACHE]
+    for char, brightness in zip(missing, measure_chars_brightness(missing, font)):
+        _BRIGHTNESS_CACHE[(char,) + font_key] = float(brightness)
 
-    char_brightness.sort(key=lambda x: x[1])
-    return [c[0] for c in char_brightness]
+    # Space is always darkest
+    brightness = np.array([0.0 if c == ' ' else _BRIGHTNESS_CACHE[(c,) + font_key]
+                           for c in chars])
+    return [chars[i] for i in np.argsort(brightness, kind='stable')]
 
 
 def process_file(filepath, font, output_dir):
@@ -184,19 +205,18 @@ def main():
     print(f"Using font: {font_path}")
 
     # Find all txt and json files (exclude Fonts folder)
-    files_to_process = []
-    for filename in os.listdir(SOURCE_DIR):
-        if filename.startswith('.'):
-            continue
-        filepath = os.path.join(SOURCE_DIR, filename)
-        if os.path.isfile(filepath) and (filename.endswith('.txt') or filename.endswith('.json')):
-            files_to_process.append(filepath)
+    # scandir caches the entry type from the directory listing, avoiding a stat per file
+    with os.scandir(SOURCE_DIR) as entries:
+        files_to_process = sorted(
+            entry.path for entry in entries
+            if not entry.name.startswith('.') and entry.name.endswith(('.txt', '.json')) and entry.is_file()
+        )
 
     print(f"\nFound {len(files_to_process)} files to process")
 
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-    for filepath in sorted(files_to_process):
+    for filepath in files_to_process:
         process_file(filepath, font, OUTPUT_DIR)
 
     print(f"\n\nDone! Sorted character files saved to {OUTPUT_DIR}")
@@ -0,0 +1,206 @@
+"""
+Shared frame pipeline for the ASCII dome converters.
+
+Worker-process state, grouping of repeated frames, bounded submission to a
+process pool and the ffmpeg stdin stream, used by png_to_ascii.py,
+video_to_ascii.py, p5_webgl_to_ascii.py and p5_local_to_ascii.py so the
+four converters share one copy.
+
+Author: ASCII Dome Project
+Version: 1.0.0
+Date: 2026-01-09
+License: MIT
+
+Dependencies:
+    - Pillow (PIL)
+    - NumPy
+"""
+
+import collections
+import os
+import shutil
+import subprocess
+import numpy as np
+from PIL import Image
+
+OUTPUT_SIZE = 2048
+
+# ASCII frames are intermediates re-encoded by ffmpeg; fast deflate beats small files.
+# Level 0 (stored) only saves about a third of the encode time for ~10x larger files
+PNG_COMPRESS_LEVEL = 1
+
+# ffmpeg output codec arguments for open_video_stream
+H264_ARGS = ('-c:v', 'libx264', '-pix_fmt', 'yuv420p')
+PRORES_ARGS = ('-c:v', 'prores_ks', '-profile:v', '2', '-pix_fmt', 'yuv422p10le')
+
+# Per-process state for frame workers, filled by init_worker_state
+worker_state = {}
+
+
+def init_worker_state(paint, glyph_tiles, **state):
+    """
+    Initialize per-process state for frame workers.
+
+    Called from each converter's pool initializer, so the glyph tiles and any
+    converter-specific entries (lookup table, grid size) are pickled once per
+    worker instead of once per frame. Also allocates the output canvas that
+    every frame in this process is painted into.
+
+    Args:
+        paint (callable): paint(char_idx, glyph_tiles, canvas) fills the text
+            area of the 2048x2048 uint8 canvas with one frame
+        glyph_tiles (numpy.ndarray): Tiles from build_glyph_tiles
+        **state: Extra entries read by the converter's own worker functions
+    """
+    worker_state.update(state, paint=paint, glyph_tiles=glyph_tiles,
+                        canvas=np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8))
+
+
+def group_repeats(indices, output_paths):
+    """
+    Pair index grids with output paths, merging runs of identical frames.
+
+    Consecutive frames with exactly the same character grid (static shots,
+    paused sketches) produce the same image, so each run is painted and
+    encoded once and then repeated.
+
+    Args:
+        indices (iterable): Character index grids, one per frame
+        output_paths (iterable): Output path for each frame
+
+    Yields:
+        tuple: (char_idx, paths) for each run, with the output paths of
+            every frame in the run
+    """
+    char_idx, paths = None, []
+    for next_idx, output_path in zip(indices, output_paths):
+        if paths and np.array_equal(next_idx, char_idx):
+            paths.append(output_path)
+            continue
+        if paths:
+            yield char_idx, paths
+        char_idx, paths = next_idx, [output_path]
+    if paths:
+        yield char_idx, paths
+
+
+def render_run(run):
+    """
+    Paint one run of identical frames and save it as PNG.
+
+    Runs in a process set up by init_worker_state. The first frame is encoded
+    and the rest of the run are file copies of it.
+
+    Args:
+        run (tuple): (char_idx, output_paths) from group_repeats; output
+            paths of None return the frame as raw grayscale bytes for
+            open_video_stream instead
+
+    Returns:
+        tuple: (raw 2048x2048 grayscale frame or None, number of frames in the run)
+    """
+    char_idx, output_paths = run
+    state = worker_state
+    canvas = state['canvas']
+    state['paint'](char_idx, state['glyph_tiles'], canvas)
+    if output_paths[0] is None:
+        # Copying the canvas is far cheaper than PIL's tobytes()
+        return canvas.tobytes(), len(output_paths)
+    Image.fromarray(canvas, 'L').save(output_paths[0], 'PNG', compress_level=PNG_COMPRESS_LEVEL)
+    for output_path in output_paths[1:]:
+        shutil.copyfile(output_paths[0], output_path)
+    return None, len(output_paths)
+
+
+def map_bounded(executor, fn, *iterables, window):
+    """
+    Like executor.map, but with at most `window` tasks in flight.
+
+    Results are yielded in input order as they complete, so finished frames
+    never pile up in memory faster than the caller (e.g. an ffmpeg pipe)
+    consumes them.
+
+    Args:
+        executor (concurrent.futures.Executor): Executor to submit tasks to
+        fn (callable): Module-level function to call for each set of arguments
+        *iterables: Argument iterables, zipped together like map()
+        window (int): Maximum number of tasks submitted but not yet consumed
+
+    Yields:
+        object: Return value of fn for each set of arguments, in order
+    """
+    pending = collections.deque()
+    for args in zip(*iterables):
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(fn, *args))
+    while pending:
+        yield pending.popleft().result()
+
+
+def open_video_stream(output_video, fps, codec_args=H264_ARGS):
+    """
+    Start ffmpeg encoding raw 2048x2048 grayscale frames from stdin.
+
+    Lets the converters hand frames straight to the encoder instead of
+    writing PNGs that ffmpeg then has to decode again.
+
+    Args:
+        output_video (str): Output video file path
+        fps (float): Frame rate for video
+        codec_args (tuple): ffmpeg output codec arguments, H264_ARGS for MP4
+            or PRORES_ARGS for ProRes MOV (default: H264_ARGS)
+
+    Returns:
+        subprocess.Popen: ffmpeg process to write frames to, or None if ffmpeg is unavailable
+    """
+    try:
+        subprocess.run(['ffmpeg', '-version'],
+                     capture_output=True,
+                     check=True)
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        print("Error: ffmpeg not found. Please install ffmpeg to stream video.")
+        print(f"  Install: brew install ffmpeg  (macOS)")
+        print("  Falling back to writing PNG frames")
+        return None
+
+    os.makedirs(os.path.dirname(output_video) or '.', exist_ok=True)
+    ffmpeg_cmd = [
+        'ffmpeg',
+        '-y',  # Overwrite output file if it exists
+        '-loglevel', 'error',  # Keep stderr small; it is only read at the end
+        '-f', 'rawvideo',
+        '-pix_fmt', 'gray',
+        '-s', f'{OUTPUT_SIZE}x{OUTPUT_SIZE}',
+        '-framerate', str(int(fps)),
+        '-i', '-',
+        *codec_args,
+        output_video
+    ]
+    return subprocess.Popen(ffmpeg_cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def close_video_stream(proc, output_video):
+    """
+    Finish a video started with open_video_stream.
+
+    Args:
+        proc (subprocess.Popen): ffmpeg process from open_video_stream
+        output_video (str): Output video file path
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    try:
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass  # ffmpeg already exited; its stderr explains why
+    stderr = proc.stderr.read().decode(errors='replace')
+    if proc.wait() != 0:
+        print(f"Error creating video: ffmpeg exited with code {proc.returncode}")
+        print(f"  stderr: {stderr}")
+        return False
+    print(f"✓ Video created successfully: {output_video}")
+    file_size = os.path.getsize(output_video) / (1024 * 1024)  # MB
+    print(f"  File size: {file_size:.1f} MB")
+    return True
@@ -21,33 +21,71 @@ Usage:
 Dependencies:
     - playwright (required)
     - Pillow (PIL)
+    - NumPy
+    - numba (optional, JIT-compiles the frame painter)
+    - cupy (optional, experimental; paints frames on a CUDA GPU with --gpu)
+    - pyvips (optional, faster PNG decode)
     - json, http.server (standard library)
     
 Installation:
-    pip install playwright pillow
+    pip install playwright pillow numpy
     playwright install chromium
 """
 
 import json
 import argparse
+import base64
+import contextlib
+import functools
+import hashlib
+import importlib.util
+import multiprocessing
 import os
+import queue
+import shutil
 import time
 import subprocess
 import http.server
 import socketserver
 import threading
 import tarfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from frame_pipeline import (OUTPUT_SIZE, PNG_COMPRESS_LEVEL, PRORES_ARGS, close_video_stream,
+                            group_repeats, init_worker_state, map_bounded, open_video_stream,
+                            render_run, worker_state)
 
-# Import playwright (required)
+# Playwright (required for capture) is imported where it's used, so conversion-only
+# runs and the spawned conversion workers don't pay for importing it
+HAS_PLAYWRIGHT = importlib.util.find_spec('playwright') is not None
+
+# Import numba (optional, paints glyph tiles in one parallel pass)
 try:
-    from playwright.sync_api import sync_playwright
-    HAS_PLAYWRIGHT = True
+    from numba import njit, prange, set_num_threads, typeof
+    HAS_NUMBA = True
 except ImportError:
-    HAS_PLAYWRIGHT = False
+    HAS_NUMBA = False
+
+# Import cupy (optional, experimental; paints glyph tiles on a CUDA GPU with --gpu)
+try:
+    import cupy as cp
+    HAS_CUPY = cp.cuda.runtime.getDeviceCount() > 0
+except (ImportError, RuntimeError):
+    HAS_CUPY = False
+
+# Import pyvips (optional, faster PNG decode; also needs the libvips library)
+try:
+    import pyvips
+    HAS_PYVIPS = True
+except (ImportError, OSError):
+    HAS_PYVIPS = False
+
 
-OUTPUT_SIZE = 2048
+# Glyph tiles saved as .npy files, reused across runs (see load_glyph_tiles). Kept next
+# to the script rather than in the working directory, so every run shares one cache
+GLYPH_CACHE_DIR = Path(__file__).resolve().parent / '.glyph_cache'
 
 FONT_DIR = "/Users/adelinesetiawan/ASCII-dome/fonts"
 FONTS = {
@@ -57,6 +95,7 @@ FONTS = {
 }
 
 
+@functools.lru_cache(maxsize=32)
 def load_characters(json_path):
     """Load character set from JSON file."""
     with open(json_path, 'r', encoding='utf-8') as f:
@@ -79,6 +118,7 @@ def get_font_metrics(font):
     return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
 
+@functools.lru_cache(maxsize=32)
 def find_html_file(sketch_path):
     """
     Find the HTML file in a p5.js sketch directory or return the path if it's already an HTML file.
@@ -145,46 +185,242 @@ def start_local_server(sketch_dir, port=8000):
     return httpd, server_url
 
 
-def frame_to_ascii(pil_image, chars, cols, rows):
-    """Convert PIL image to ASCII lines. Optimized for 30fps processing."""
-    # Convert to grayscale and resize in one step for efficiency
-    gray = pil_image.convert("L")
-    resized = gray.resize((cols, rows), Image.Resampling.LANCZOS)
-    
-    # Get pixels as array for faster access
-    pixels = list(resized.getdata())
+def build_index_lut(chars):
+    """Build a 256-entry pixel brightness -> character index lookup table."""
     num_chars = len(chars)
+    lut = np.minimum((np.arange(256) * num_chars) >> 8, num_chars - 1)
+    # uint8 indices whenever they fit, so lookups stay byte-sized
+    return lut.astype(np.uint8) if num_chars <= 256 else lut
+
+
+def pad_chars_to_pow2(chars):
+    """Stretch a character set to the next power-of-two length (max 256) by repeating characters evenly."""
+    num_chars = len(chars)
+    target = min(1 << (num_chars - 1).bit_length(), 256)
+    if num_chars >= target:
+        return chars
+    return ''.join(chars[i * num_chars // target] for i in range(target))
+
+
+def index_shift(num_chars):
+    """Right shift mapping brightness to a character index, or None unless num_chars is a power of two <= 256."""
+    if num_chars > 256 or num_chars & (num_chars - 1):
+        return None
+    return 9 - num_chars.bit_length()
+
+
+@functools.lru_cache(maxsize=8)
+def build_char_table(chars):
+    """Build a 256-byte brightness -> ASCII character table for bytes.translate (cached per set)."""
+    return np.frombuffer(chars.encode('ascii'), dtype=np.uint8)[build_index_lut(chars)].tobytes()
+
+
+def build_glyph_tiles(font, chars, char_w, char_h):
+    """Pre-rasterize each character into a (char_h, char_w) tile aligned to the 'W' bbox."""
+    left, top = font.getbbox("W")[:2]
+    tiles = np.zeros((len(chars), char_h, char_w), dtype=np.uint8)
+    for i, char in enumerate(chars):
+        tile = Image.new('L', (char_w, char_h), color=0)
+        ImageDraw.Draw(tile).text((-left, -top), char, font=font, fill=255)
+        tiles[i] = np.asarray(tile)
+    return tiles
+
+
+def load_glyph_tiles(font, chars, char_w, char_h):
+    """Return glyph tiles for this font and character set, cached on disk across runs."""
+    font_path = getattr(font, 'path', None)
+    if not isinstance(font_path, str):
+        # Fonts not loaded from a file (e.g. PIL's default) have no stable key
+        return build_glyph_tiles(font, chars, char_w, char_h)
     
-    # Pre-calculate character mapping for performance
-    char_map = [chars[min(int(p / 256 * num_chars), num_chars - 1)] for p in pixels]
+    try:
+        # Size and mtime in the key, so a font file replaced in place isn't served stale tiles
+        stat = os.stat(font_path)
+    except OSError:
+        return build_glyph_tiles(font, chars, char_w, char_h)
+    key = hashlib.sha256(
+        f"{font_path}|{stat.st_size}|{stat.st_mtime_ns}|{font.size}|{font.index}|"
+        f"{char_w}x{char_h}|{chars}".encode('utf-8')
+    ).hexdigest()
+    cache_path = GLYPH_CACHE_DIR / f'{key}.npy'
+    try:
+        # Plain array data only: never unpickle objects from the cache directory
+        glyph_tiles = np.load(cache_path, allow_pickle=False)
+        if glyph_tiles.dtype == np.uint8 and glyph_tiles.shape == (len(chars), char_h, char_w):
+            return glyph_tiles
+    except (OSError, ValueError):
+        pass
+    
+    glyph_tiles = build_glyph_tiles(font, chars, char_w, char_h)
+    try:
+        GLYPH_CACHE_DIR.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.save(f, glyph_tiles, allow_pickle=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return glyph_tiles
+
+
+def load_frame(png_path, cols, rows):
+    """Decode an input frame, with pyvips when installed, otherwise PIL (draft mode for JPEGs)."""
+    if HAS_PYVIPS:
+        image = pyvips.Image.new_from_file(str(png_path), access='sequential')
+        if image.format == 'uchar':
+            pixels = np.ndarray(buffer=image.write_to_memory(), dtype=np.uint8,
+                                shape=[image.height, image.width, image.bands])
+            return Image.fromarray(pixels[:, :, 0] if image.bands == 1 else pixels)
     
-    # Build ASCII lines efficiently
-    ascii_lines = []
-    for row in range(rows):
-        start_idx = row * cols
-        line = ''.join(char_map[start_idx:start_idx + cols])
-        ascii_lines.append(line)
+    pil_image = Image.open(png_path)
+    # Decoders that support it (JPEG) decode straight to grayscale at a reduced scale
+    pil_image.draft('L', (cols, rows))
+    pil_image.load()
+    return pil_image
+
+
+def _resize_to_grid(pil_image, cols, rows):
+    """Convert image to grayscale and resize to one pixel per character cell (L-mode image)."""
+    gray = pil_image.convert("L")
+    # Output is quantized to a few dozen characters, so a cheap filter is enough:
+    # shrink by the integer factor with reduce() (a plain block average), then
+    # BOX-resize away the small remainder when the grid doesn't divide evenly
+    factor_x = max(gray.width // cols, 1)
+    factor_y = max(gray.height // rows, 1)
+    resized = gray.reduce((factor_x, factor_y)) if factor_x > 1 or factor_y > 1 else gray
+    if resized.size != (cols, rows):
+        resized = resized.resize((cols, rows), Image.Resampling.BOX)
+    return resized
 
-    return ascii_lines
+
+def downsample_frame(pil_image, cols, rows):
+    """Convert image to per-cell brightness values as a (rows, cols) uint8 array."""
+    return np.asarray(_resize_to_grid(pil_image, cols, rows), dtype=np.uint8)
+
+
+def frame_to_indices(pil_image, index_lut, cols, rows):
+    """Convert image to a (rows, cols) grid of character indices, without building strings."""
+    resized = _resize_to_grid(pil_image, cols, rows)
+    if isinstance(index_lut, int):
+        # Power-of-two character set: one vectorized shift instead of a table lookup
+        return np.asarray(resized) >> index_lut
+    if index_lut[-1] > 255:
+        # Indices no longer fit in an L-mode image; gather in NumPy instead
+        return np.asarray(index_lut)[np.asarray(resized)]
+    # Map brightness to character index in one C pass over the image buffer
+    return np.asarray(resized.point(index_lut), dtype=np.uint8)
+
+
+def frame_to_ascii(pil_image, chars, cols, rows, index_lut=None):
+    """Convert PIL image to ASCII lines. Optimized for 30fps processing."""
+    if chars.isascii():
+        # One bytes.translate maps brightness bytes straight to character bytes
+        text = downsample_frame(pil_image, cols, rows).tobytes().translate(build_char_table(chars))
+        text = text.decode('ascii')
+        return [text[r * cols:(r + 1) * cols] for r in range(rows)]
+    
+    if index_lut is None:
+        index_lut = build_index_lut(chars).tolist()
+    
+    # Look up every cell's character and view each row as one string
+    char_idx = frame_to_indices(pil_image, index_lut, cols, rows)
+    return np.array(list(chars), dtype='U1')[char_idx].view(f'U{cols}').ravel().tolist()
 
 
 def render_ascii_frame(ascii_lines, font, char_w, char_h):
     """Render ASCII lines to 2048x2048 PNG image. Optimized for 30fps processing."""
-    # Create image with black background
-    img = Image.new('RGB', (OUTPUT_SIZE, OUTPUT_SIZE), color=(0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    # Index every cell by code point, then blit cached glyph tiles instead of
+    # running FreeType layout for every line
+    codes = np.frombuffer(''.join(ascii_lines).encode('utf-32-le'), dtype=np.uint32)
+    unique_codes, char_idx = np.unique(codes, return_inverse=True)
+    glyph_tiles = np.stack([_glyph_tile(font, chr(code), char_w, char_h) for code in unique_codes])
+    return render_glyph_frame(char_idx.reshape(len(ascii_lines), -1), glyph_tiles)
 
-    # Calculate text dimensions and centering offsets
-    text_width = len(ascii_lines[0]) * char_w
-    text_height = len(ascii_lines) * char_h
-    x_offset = (OUTPUT_SIZE - text_width) // 2
-    y_offset = (OUTPUT_SIZE - text_height) // 2
 
-    # Render all lines efficiently (optimized for 30fps throughput)
-    for i, line in enumerate(ascii_lines):
-        draw.text((x_offset, y_offset + i * char_h), line, font=font, fill=(255, 255, 255))
+@functools.lru_cache(maxsize=1024)
+def _glyph_tile(font, char, char_w, char_h):
+    """Rasterize a single glyph tile for render_ascii_frame, cached per font and character."""
+    return build_glyph_tiles(font, char, char_w, char_h)[0]
 
-    return img
+
+def render_glyph_frame(char_idx, glyph_tiles, out=None):
+    """Composite pre-rasterized glyph tiles into a 2048x2048 image with one NumPy gather per text row."""
+    rows, cols = char_idx.shape
+    _, char_h, char_w = glyph_tiles.shape
+    text_h, text_w = rows * char_h, cols * char_w
+    
+    # The text area is fully rewritten each frame, so a reused canvas keeps its black border
+    canvas = np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8) if out is None else out
+    y_offset = (OUTPUT_SIZE - text_h) // 2
+    x_offset = (OUTPUT_SIZE - text_w) // 2
+    # View the text area as (rows, char_h, cols, char_w) cells and gather tiles straight
+    # into it, skipping an intermediate text block
+    cells = canvas[y_offset:y_offset + text_h, x_offset:x_offset + text_w].reshape(rows, char_h, cols, char_w)
+    # Regroup the tiles as (char_h, num_chars, char_w) glyph scanlines, so each text row
+    # is one gather of contiguous char_w-byte runs written straight into its stripe
+    glyph_rows = np.ascontiguousarray(glyph_tiles.transpose(1, 0, 2))
+    for r in range(rows):
+        np.take(glyph_rows, char_idx[r], axis=1, out=cells[r], mode='clip')
+    return Image.fromarray(canvas, 'L')
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _paint_glyphs(char_idx, glyph_tiles, out, y_offset, x_offset):
+        """Glyph blit straight into the canvas, parallel over character rows."""
+        rows, cols = char_idx.shape
+        char_h, char_w = glyph_tiles.shape[1], glyph_tiles.shape[2]
+        for r in prange(rows):
+            # Each task owns one band of char_h scanlines (a few tens of KB, cache-sized)
+            # and fills it scanline by scanline, so writes stream left to right
+            for y in range(char_h):
+                line = out[y_offset + r * char_h + y]
+                for c in range(cols):
+                    src = glyph_tiles[char_idx[r, c], y]
+                    x0 = x_offset + c * char_w
+                    for x in range(char_w):
+                        line[x0 + x] = src[x]
+
+
+def init_gpu_painter(glyph_tiles, cols, rows):
+    """Upload glyph tiles to the GPU once and allocate the buffers _paint_glyphs_gpu reuses per frame."""
+    _, char_h, char_w = glyph_tiles.shape
+    return {
+        'tiles': cp.asarray(glyph_tiles),
+        'gathered': cp.empty((rows, cols, char_h, char_w), dtype=cp.uint8),
+        'block': cp.empty((rows, char_h, cols, char_w), dtype=cp.uint8),
+        'host_block': np.empty((rows, char_h, cols, char_w), dtype=np.uint8),
+    }
+
+
+def _paint_glyphs_gpu(char_idx, gpu, canvas):
+    """Gather glyph tiles on the GPU into reused buffers and copy the text block into the canvas."""
+    rows, char_h, cols, char_w = gpu['block'].shape
+    cp.take(gpu['tiles'], cp.asarray(char_idx), axis=0, out=gpu['gathered'])
+    # Reorder cells into scanline order on the device, then bring the block back in one copy
+    cp.copyto(gpu['block'], gpu['gathered'].transpose(0, 2, 1, 3))
+    gpu['block'].get(out=gpu['host_block'])
+    y_offset = (OUTPUT_SIZE - rows * char_h) // 2
+    x_offset = (OUTPUT_SIZE - cols * char_w) // 2
+    cells = canvas[y_offset:y_offset + rows * char_h, x_offset:x_offset + cols * char_w]
+    np.copyto(cells.reshape(rows, char_h, cols, char_w), gpu['host_block'])
+
+
+def paint_ascii_frame(char_idx, glyph_tiles, out=None, gpu=None):
+    """Paint a grid of character indices into a 2048x2048 image (GPU or numba-parallel when available)."""
+    if gpu is None and not HAS_NUMBA:
+        return render_glyph_frame(char_idx, glyph_tiles, out)
+    
+    canvas = np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8) if out is None else out
+    if gpu is not None:
+        _paint_glyphs_gpu(char_idx, gpu, canvas)
+        return Image.fromarray(canvas, 'L')
+    
+    rows, cols = char_idx.shape
+    _, char_h, char_w = glyph_tiles.shape
+    _paint_glyphs(char_idx, glyph_tiles, canvas,
+                  (OUTPUT_SIZE - rows * char_h) // 2, (OUTPUT_SIZE - cols * char_w) // 2)
+    return Image.fromarray(canvas, 'L')
 
 
 def capture_frames_playwright(html_path, sketch_dir, output_dir, num_frames, fps, wait_time=2):
@@ -204,6 +440,8 @@ def capture_frames_playwright(html_path, sketch_dir, output_dir, num_frames, fps
     Returns:
         str: Path to output directory containing captured frames
     """
+    from playwright.sync_api import sync_playwright
+    
     print(f"Waiting for manual recording (press R to start, S to stop)...")
     
     html_path = Path(html_path)
@@ -307,7 +545,191 @@ def capture_frames_playwright(html_path, sketch_dir, output_dir, num_frames, fps
     return output_dir
 
 
-def convert_png_to_ascii(png_dir, chars, font, font_size, output_dir, target_fps=30.0):
+# Steps a global-mode p5.js sketch by hand and returns each frame as a PNG data URL.
+# Reading the canvas right after redraw() works for WEBGL without preserveDrawingBuffer.
+_STEP_FRAMES_JS = """
+(count) => {
+    const canvas = document.querySelector('canvas');
+    noLoop();
+    const frames = [];
+    for (let i = 0; i < count; i++) {
+        redraw();
+        frames.push(canvas.toDataURL('image/png'));
+    }
+    return frames;
+}
+"""
+
+
+def capture_frames_direct(html_path, sketch_dir, output_dir, num_frames, wait_time=2,
+                          headless=True, batch_size=30):
+    """
+    Capture frames by stepping the p5.js sketch with redraw() and reading the canvas.
+    
+    Stops the sketch's draw loop, then renders frames one at a time with
+    redraw() and grabs each with canvas.toDataURL(), returning them to Python
+    in batches. No keyboard interaction, wall-clock recording window or tar
+    round-trip is needed, and capture runs as fast as the sketch can render.
+    
+    Args:
+        html_path (str): Path to HTML file containing p5.js sketch
+        sketch_dir (str): Directory containing the sketch files
+        output_dir (str): Directory to save captured PNG frames
+        num_frames (int): Number of frames to capture
+        wait_time (float): Seconds to wait for p5.js initialization (default: 2)
+        headless (bool): Run Chromium without a window (default: True). Headless
+            WEBGL may fall back to software GL; pass False to compare speeds.
+        batch_size (int): Frames returned per page.evaluate call (default: 30)
+        
+    Returns:
+        str: Path to output directory containing captured frames
+    """
+    from playwright.sync_api import sync_playwright
+    
+    print(f"Capturing {num_frames} frames by stepping the sketch with redraw()...")
+    
+    html_path = Path(html_path)
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Start local HTTP server
+    print("Starting local HTTP server...")
+    httpd, server_url = start_local_server(str(sketch_dir))
+    
+    try:
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=headless)
+            context = browser.new_context(
+                viewport={'width': 2048, 'height': 2048},
+                device_scale_factor=1
+            )
+            page = context.new_page()
+            
+            # Load the HTML file via HTTP server
+            html_url = f"{server_url}/{html_path.name}"
+            print(f"Loading: {html_url}")
+            page.goto(html_url, wait_until='networkidle', timeout=30000)
+            page.wait_for_selector('canvas', timeout=10000)
+            
+            # Wait for p5.js to initialize
+            print("Waiting for p5.js to initialize...")
+            time.sleep(wait_time)
+            
+            start_time = time.time()
+            captured = 0
+            while captured < num_frames:
+                count = min(batch_size, num_frames - captured)
+                for data_url in page.evaluate(_STEP_FRAMES_JS, count):
+                    png_bytes = base64.b64decode(data_url.split(',', 1)[1])
+                    with open(os.path.join(output_dir, f'frame_{captured:06d}.png'), 'wb') as f:
+                        f.write(png_bytes)
+                    captured += 1
+                elapsed = time.time() - start_time
+                print(f"  {captured}/{num_frames} frames | {captured / elapsed:.1f} fps")
+            
+            browser.close()
+    finally:
+        # Shutdown server
+        httpd.shutdown()
+        httpd.server_close()
+    
+    print(f"Captured {captured} frames to '{output_dir}/'")
+    return output_dir
+
+
+# Per-process state for frame workers, set by _init_frame_worker
+
+
+def _init_frame_worker(index_lut, glyph_tiles, cols, rows, use_gpu=False):
+    """Set up a worker process to decode frames and paint runs with render_run, optionally on the GPU."""
+    gpu = init_gpu_painter(glyph_tiles, cols, rows) if use_gpu else None
+    init_worker_state(functools.partial(paint_ascii_frame, gpu=gpu), glyph_tiles,
+                      index_lut=index_lut, cols=cols, rows=rows)
+    if HAS_NUMBA:
+        # Frames are already spread across processes; threading the kernel too would oversubscribe
+        set_num_threads(1)
+
+
+def _load_indices(png_path):
+    """Decode one PNG frame and map it to a grid of character indices."""
+    state = worker_state
+    pil_image = load_frame(png_path, state['cols'], state['rows'])
+    return frame_to_indices(pil_image, state['index_lut'], state['cols'], state['rows'])
+
+
+def _iter_frames_threaded(png_files, output_paths, index_lut, glyph_tiles, cols, rows, video_stream=None,
+                          gpu=None):
+    """Convert frames in-process with decode+quantize and encode on their own threads; yields (None, 1) per frame."""
+    # Index grids are only rows x cols bytes, so the reader can run well ahead
+    decoded = queue.Queue(maxsize=8)
+    encoded = queue.Queue(maxsize=4)
+    write_errors = []
+    
+    # Recycle a fixed set of canvases: one per frame the writer can hold, plus the one
+    # it is encoding, the last frame it kept for repeats and the one being painted.
+    # Each text area is fully repainted, so the black border never needs clearing.
+    free_canvases = queue.Queue()
+    for _ in range(encoded.maxsize + 3):
+        free_canvases.put(np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8))
+    
+    def reader():
+        try:
+            for png_path in png_files:
+                # Decode, downsample and quantize off the paint thread; PIL releases the GIL
+                decoded.put(frame_to_indices(load_frame(png_path, cols, rows), index_lut, cols, rows))
+        except Exception as e:
+            decoded.put(e)
+    
+    def writer():
+        last_canvas = last_path = None
+        while (item := encoded.get()) is not None:
+            img, canvas, output_path = item
+            try:
+                if img is None:
+                    # Unchanged frame: repeat the last one written
+                    if output_path is None:
+                        video_stream.stdin.write(last_canvas)
+                    else:
+                        shutil.copyfile(last_path, output_path)
+                elif output_path is None:
+                    # Write the array backing img straight to the pipe, no copy
+                    video_stream.stdin.write(canvas)
+                else:
+                    img.save(output_path, 'PNG', compress_level=PNG_COMPRESS_LEVEL)
+            except Exception as e:
+                write_errors.append(e)
+            if img is not None:
+                if last_canvas is not None:
+                    free_canvases.put(last_canvas)
+                last_canvas, last_path = canvas, output_path
+    
+    threads = [threading.Thread(target=reader, daemon=True),
+               threading.Thread(target=writer, daemon=True)]
+    for thread in threads:
+        thread.start()
+    
+    previous_idx = None
+    for output_path in output_paths:
+        char_idx = decoded.get()
+        if isinstance(char_idx, Exception):
+            raise char_idx
+        if previous_idx is not None and np.array_equal(char_idx, previous_idx):
+            # Same characters as the previous frame, so skip painting and encoding
+            encoded.put((None, None, output_path))
+        else:
+            canvas = free_canvases.get()
+            encoded.put((paint_ascii_frame(char_idx, glyph_tiles, canvas, gpu), canvas, output_path))
+        previous_idx = char_idx
+        yield None, 1
+    
+    encoded.put(None)
+    for thread in threads:
+        thread.join()
+    if write_errors:
+        raise write_errors[0]
+
+
+def convert_png_to_ascii(png_dir, chars, font, font_size, output_dir, target_fps=30.0, workers=None,
+                         video_stream=None, gpu=False):
     """
     Convert PNG frames to ASCII art frames. Optimized for 30fps processing.
     
@@ -322,6 +744,12 @@ def convert_png_to_ascii(png_dir, chars, font, font_size, output_dir, target_fps
         font_size (int): Font size in points (for metrics calculation)
         output_dir (str): Directory to save ASCII frames
         target_fps (float): Target processing speed in fps (default: 30.0)
+        workers (int): Number of worker processes; 1 runs a threaded in-process
+            pipeline instead (default: os.cpu_count())
+        video_stream (subprocess.Popen): ffmpeg process from open_video_stream;
+            when given, frames are piped to it instead of saved as PNGs
+        gpu (bool): Paint on the CUDA GPU with CuPy (experimental); each
+            worker process opens its own CUDA context (default: False)
         
     Returns:
         str: Path to output directory containing ASCII frames
@@ -337,6 +765,13 @@ def convert_png_to_ascii(png_dir, chars, font, font_size, output_dir, target_fps
     rows = OUTPUT_SIZE // char_h
     print(f"Grid: {cols}x{rows} characters")
     
+    # Brightness -> character table and glyph bitmaps are invariant across frames.
+    # Power-of-two sets map brightness with a shift; any other size goes through the table,
+    # handed over as a list once since Image.point rebuilds it from any other sequence
+    shift = index_shift(len(chars))
+    index_lut = build_index_lut(chars).tolist() if shift is None else shift
+    glyph_tiles = load_glyph_tiles(font, chars, char_w, char_h)
+    
     # Find all PNG files
     png_files = sorted(Path(png_dir).glob('*.png'))
     if not png_files:
@@ -346,38 +781,79 @@ def convert_png_to_ascii(png_dir, chars, font, font_size, output_dir, target_fps
     print(f"Found {len(png_files)} PNG files")
     os.makedirs(output_dir, exist_ok=True)
     
+    if video_stream:
+        # Frames go straight to the encoder; no PNGs are written
+        output_paths = [None] * len(png_files)
+    else:
+        output_paths = [os.path.join(output_dir, f'frame_{i:06d}.png') for i in range(len(png_files))]
+    workers = workers or os.cpu_count()
+    if workers > 1:
+        print(f"Using {workers} worker processes")
+    else:
+        print("Using a single process with threaded decode/encode")
+    # The CuPy painter is experimental and opt-in
+    use_gpu = HAS_CUPY and gpu
+    if use_gpu:
+        print("Painting frames on the GPU (CuPy, experimental)")
+    elif gpu:
+        print("Warning: --gpu needs CuPy and a CUDA device; painting on the CPU")
+    
+    if HAS_NUMBA and not use_gpu:
+        # Compile the paint kernel once, with the exact argument types frames will use,
+        # so worker processes load it from numba's on-disk cache instead of each compiling it
+        sample_idx = frame_to_indices(Image.new('L', (cols, rows)), index_lut, cols, rows)
+        canvas = np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8)
+        _paint_glyphs.compile(tuple(typeof(arg) for arg in (sample_idx, glyph_tiles, canvas, 0, 0)))
+    
     # Performance tracking for 30fps
     start_time = time.time()
-    frame_time_target = 1.0 / target_fps  # Target time per frame (33.33ms for 30fps)
+    report_time = start_time
     
-    for i, png_path in enumerate(png_files):
-        frame_start = time.time()
-        
-        # Load image
-        pil_image = Image.open(png_path)
-        
-        # Convert to ASCII (optimized for 30fps)
-        ascii_lines = frame_to_ascii(pil_image, chars, cols, rows)
-        img = render_ascii_frame(ascii_lines, font, char_w, char_h)
-        
-        # Save ASCII frame
-        output_path = os.path.join(output_dir, f'frame_{i:06d}.png')
-        img.save(output_path, 'PNG')
-        
-        # Performance reporting
-        frame_time = time.time() - frame_start
-        current_fps = 1.0 / frame_time if frame_time > 0 else 0
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            # Frames are independent, so convert them in parallel; map() keeps input order.
+            # Spawn (the macOS default) rather than fork: forking after numba has compiled
+            # in this process leaves workers that hang on exit
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_frame_worker,
+                initargs=(index_lut, glyph_tiles, cols, rows, use_gpu)))
+            # Decode in the pool too; only the small index grids come back here to be
+            # checked for repeats, so each run of identical frames is painted once
+            indices = map_bounded(executor, _load_indices, png_files, window=workers * 2)
+            runs = group_repeats(indices, output_paths)
+            frames = map_bounded(executor, render_run, runs, window=workers * 2)
+        else:
+            # Single process: overlap PNG decode, ASCII conversion and PNG encode on threads
+            gpu_painter = init_gpu_painter(glyph_tiles, cols, rows) if use_gpu else None
+            frames = _iter_frames_threaded(png_files, output_paths, index_lut, glyph_tiles, cols, rows,
+                                           video_stream, gpu_painter)
         
-        if (i + 1) % 10 == 0:
-            elapsed = time.time() - start_time
-            avg_fps = (i + 1) / elapsed if elapsed > 0 else 0
-            status = "✓" if current_fps >= target_fps * 0.9 else "⚠"
-            print(f"  {status} {i + 1}/{len(png_files)} frames | "
-                  f"Current: {current_fps:.1f} fps | Avg: {avg_fps:.1f} fps")
+        done = reported = 0
+        for frame, count in frames:
+            if frame is not None:
+                for _ in range(count):
+                    video_stream.stdin.write(frame)
+            done += count
+            
+            # Performance reporting, every 10 frames (a run of repeats may cross several)
+            if done // 10 > reported // 10:
+                now = time.time()
+                current_fps = (done - reported) / (now - report_time) if now > report_time else 0
+                report_time, reported = now, done
+                elapsed = now - start_time
+                avg_fps = done / elapsed if elapsed > 0 else 0
+                status = "✓" if current_fps >= target_fps * 0.9 else "⚠"
+                print(f"  {status} {done}/{len(png_files)} frames | "
+                      f"Current: {current_fps:.1f} fps | Avg: {avg_fps:.1f} fps")
     
     total_time = time.time() - start_time
     final_fps = len(png_files) / total_time if total_time > 0 else 0
-    print(f"\nDone. {len(png_files)} ASCII frames saved to '{output_dir}/'")
+    if video_stream:
+        print(f"\nDone. {len(png_files)} ASCII frames streamed to ffmpeg")
+    else:
+        print(f"\nDone. {len(png_files)} ASCII frames saved to '{output_dir}/'")
     print(f"Processing speed: {final_fps:.1f} fps (target: {target_fps} fps)")
     return output_dir
 
@@ -402,9 +878,13 @@ def main():
         --png-output: Directory for temporary PNG frames (default: p5_frames)
         --output: Directory for final ASCII frames (default: ascii_frames/p5_webgl)
         --video-output: Output video file path (default: auto-generated from input name)
+        --direct-capture: Capture headlessly with redraw() + toDataURL (flag)
         --skip-png: Skip PNG capture, only convert existing PNGs (flag)
         --skip-ascii: Skip ASCII conversion, only capture PNGs (flag)
         --skip-video: Skip video creation, only create PNG frames (flag)
+        --stream: Pipe ASCII frames straight to ffmpeg, no PNG frames (flag)
+        --workers: Worker processes for ASCII conversion (default: CPU count)
+        --gpu: Paint frames on a CUDA GPU with CuPy, experimental (flag)
         
     Output:
         Creates directories with frame_000000.png, frame_000001.png, etc.
@@ -428,9 +908,14 @@ def main():
     parser.add_argument('--png-output', default='p5_frames', help='Temporary PNG output directory')
     parser.add_argument('--output', default='ascii_frames/p5_webgl', help='Final ASCII output directory')
     parser.add_argument('--video-output', help='Output video file path (default: auto-generated from input name)')
+    parser.add_argument('--direct-capture', action='store_true', help='Capture frames headlessly by stepping the sketch with redraw() instead of R/S recording')
     parser.add_argument('--skip-png', action='store_true', help='Skip PNG capture, only convert existing PNGs')
     parser.add_argument('--skip-ascii', action='store_true', help='Skip ASCII conversion, only capture PNGs')
     parser.add_argument('--skip-video', action='store_true', help='Skip video creation, only create PNG frames')
+    parser.add_argument('--stream', action='store_true', help='Pipe ASCII frames straight to ffmpeg instead of writing PNG frames')
+    parser.add_argument('--workers', type=int, help='Worker processes for ASCII conversion (default: CPU count)')
+    parser.add_argument('--gpu', action='store_true', help='Paint frames on a CUDA GPU with CuPy (experimental)')
+    parser.add_argument('--pow2-chars', action='store_true', help='Stretch the character set to a power-of-two length so brightness maps to a character with one bit shift')
     args = parser.parse_args()
     
     # Find HTML file
@@ -456,6 +941,8 @@ def main():
         if not chars:
             print("Error: No characters loaded")
             return
+        if args.pow2_chars:
+            chars = pad_chars_to_pow2(chars)
         print(f"Loaded {len(chars)} characters: {chars[:20]}...")
         
         # Load font
@@ -476,14 +963,23 @@ def main():
         # Get sketch directory (parent of HTML file)
         sketch_dir = str(Path(html_path).parent)
         
-        capture_frames_playwright(
-            html_path,
-            sketch_dir,
-            args.png_output,
-            args.frames,
-            args.fps,
-            args.wait
-        )
+        if args.direct_capture:
+            capture_frames_direct(
+                html_path,
+                sketch_dir,
+                args.png_output,
+                args.frames,
+                args.wait
+            )
+        else:
+            capture_frames_playwright(
+                html_path,
+                sketch_dir,
+                args.png_output,
+                args.frames,
+                args.fps,
+                args.wait
+            )
     
     # Step 2: Convert PNG frames to ASCII
     if not args.skip_ascii:
@@ -491,21 +987,6 @@ def main():
         print("STEP 2: Converting PNG frames to ASCII")
         print(f"{'='*60}")
         
-        convert_png_to_ascii(
-            args.png_output,
-            chars,
-            font,
-            args.font_size,
-            args.output,
-            args.fps
-        )
-        
-        print(f"\n{'='*60}")
-        print("COMPLETE!")
-        print(f"{'='*60}")
-        print(f"ASCII frames saved to: {args.output}/")
-        
-        # Automatically create video from ASCII frames
         if not args.skip_video:
             # Generate output video filename
             if args.video_output:
@@ -516,7 +997,38 @@ def main():
                 video_output = html_path_obj.stem + '_ascii.mov'
                 # Save in same directory as output frames
                 video_output = os.path.join(args.output, video_output)
-            
+        
+        # Optionally pipe frames straight into ffmpeg instead of writing PNGs
+        video_stream = None
+        if args.stream and not args.skip_video:
+            print(f"\nStreaming frames to ffmpeg: {video_output}")
+            video_stream = open_video_stream(video_output, args.fps, PRORES_ARGS)
+        
+        try:
+            convert_png_to_ascii(
+                args.png_output,
+                chars,
+                font,
+                args.font_size,
+                args.output,
+                args.fps,
+                args.workers,
+                video_stream,
+                args.gpu
+            )
+        except BrokenPipeError:
+            print("Error: ffmpeg stopped accepting frames")
+        
+        print(f"\n{'='*60}")
+        print("COMPLETE!")
+        print(f"{'='*60}")
+        if not video_stream:
+            print(f"ASCII frames saved to: {args.output}/")
+        
+        # Automatically create video from ASCII frames
+        if video_stream:
+            close_video_stream(video_stream, video_output)
+        elif not args.skip_video:
             print(f"\nCreating video: {video_output}")
             
             # Check if ffmpeg is available
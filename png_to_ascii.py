@@ -18,19 +18,28 @@ Usage:
 
 Dependencies:
     - Pillow (PIL)
+    - NumPy
     - json (standard library)
-    - glob (standard library)
 """
 
 import json
 import argparse
+import contextlib
+import functools
 import os
-import glob
 import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from frame_pipeline import (OUTPUT_SIZE, close_video_stream, group_repeats, init_worker_state,
+                            map_bounded, open_video_stream, render_run, worker_state)
 
-OUTPUT_SIZE = 2048
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg'}
+
+# Images decoded ahead of the frame being rendered when running in one process
+PREFETCH_THREADS = 2
 
 FONT_DIR = "/Users/adelinesetiawan/ASCII-dome/fonts"
 FONTS = {
@@ -103,6 +112,92 @@ def get_font_metrics(font):
     return bbox[2] - bbox[0], bbox[3] - bbox[1]
 
 
+@functools.lru_cache(maxsize=8)
+def build_index_lut(chars):
+    """
+    Build a 256-entry lookup table mapping pixel brightness to a character index.
+    
+    Equivalent to min(int(pixel / 256 * len(chars)), len(chars) - 1) for every
+    pixel value, computed once per character set instead of once per pixel.
+    
+    Args:
+        chars (str): Sorted character string (dark to light)
+        
+    Returns:
+        numpy.ndarray: Character indices indexed by pixel value (0-255)
+    """
+    num_chars = len(chars)
+    lut = np.minimum((np.arange(256) * num_chars) >> 8, num_chars - 1)
+    # uint8 indices whenever they fit, so index grids are 8x smaller to gather
+    # and to hand to worker processes
+    return lut.astype(np.uint8) if num_chars <= 256 else lut
+
+
+@functools.lru_cache(maxsize=8)
+def build_char_table(chars):
+    """
+    Build a 256-byte table mapping pixel brightness to an ASCII character byte.
+    
+    Suitable for bytes.translate. Cached per character set, so repeated
+    frame_to_ascii calls reuse it.
+    
+    Args:
+        chars (str): Sorted ASCII character string (dark to light)
+        
+    Returns:
+        bytes: Character byte for each pixel value (0-255)
+    """
+    return np.frombuffer(chars.encode('ascii'), dtype=np.uint8)[build_index_lut(chars)].tobytes()
+
+
+def _resize_to_grid(pil_image, cols, rows):
+    """
+    Convert an image to grayscale and average it down to one pixel per cell.
+    
+    Args:
+        pil_image (PIL.Image): Input image (any color mode)
+        cols (int): Number of character columns (width)
+        rows (int): Number of character rows (height)
+        
+    Returns:
+        PIL.Image: Grayscale (L) image of size (cols, rows)
+    """
+    gray = pil_image.convert("L")
+    # The downsample ratio is large and the output is quantized to a few dozen
+    # characters, so a plain block average with reduce() replaces LANCZOS. A BOX
+    # resize then averages away the remainder, so the whole frame is covered
+    factor_x = max(gray.width // cols, 1)
+    factor_y = max(gray.height // rows, 1)
+    resized = gray.reduce((factor_x, factor_y)) if factor_x > 1 or factor_y > 1 else gray
+    if resized.size != (cols, rows):
+        resized = resized.resize((cols, rows), Image.Resampling.BOX)
+    return resized
+
+
+def frame_to_indices(pil_image, index_lut, cols, rows):
+    """
+    Convert a PIL image to a grid of character indices.
+    
+    Converts image to grayscale, resizes to specified dimensions, and maps
+    each cell to its character index with Image.point, a single C pass over
+    the resized buffer.
+    
+    Args:
+        pil_image (PIL.Image): Input image (any color mode)
+        index_lut (list): Table from build_index_lut as a list
+        cols (int): Number of character columns (width)
+        rows (int): Number of character rows (height)
+        
+    Returns:
+        numpy.ndarray: Character indices of shape (rows, cols)
+    """
+    resized = _resize_to_grid(pil_image, cols, rows)
+    if index_lut[-1] > 255:
+        # Indices no longer fit in an L-mode image; gather in NumPy instead
+        return np.asarray(index_lut)[np.asarray(resized)]
+    return np.asarray(resized.point(index_lut), dtype=np.uint8)
+
+
 def frame_to_ascii(pil_image, chars, cols, rows):
     """
     Convert a PIL image to ASCII art lines.
@@ -120,23 +215,42 @@ def frame_to_ascii(pil_image, chars, cols, rows):
     Returns:
         list: List of strings, each string is one row of ASCII characters
     """
-    gray = pil_image.convert("L")
-    resized = gray.resize((cols, rows), Image.Resampling.LANCZOS)
-    pixels = list(resized.getdata())
-
-    num_chars = len(chars)
-    ascii_lines = []
+    if chars.isascii():
+        # One bytes.translate maps brightness bytes straight to character bytes
+        text = _resize_to_grid(pil_image, cols, rows).tobytes().translate(build_char_table(chars))
+        text = text.decode('ascii')
+        return [text[r * cols:(r + 1) * cols] for r in range(rows)]
+    
+    # Map every pixel to its character index, then view each row of single
+    # characters as one string
+    char_idx = frame_to_indices(pil_image, build_index_lut(chars).tolist(), cols, rows)
+    return np.array(list(chars), dtype='U1')[char_idx].view(f'U{cols}').ravel().tolist()
 
-    for row in range(rows):
-        line = ""
-        for col in range(cols):
-            pixel = pixels[row * cols + col]
-            idx = int(pixel / 256 * num_chars)
-            idx = min(idx, num_chars - 1)
-            line += chars[idx]
-        ascii_lines.append(line)
 
-    return ascii_lines
+def build_glyph_tiles(font, chars, char_w, char_h):
+    """
+    Pre-rasterize every character into a fixed-size grayscale tile.
+    
+    Glyphs are aligned to the 'W' bounding box used by get_font_metrics, so
+    each tile covers exactly one char_w x char_h cell of the output grid.
+    Rendering once up front replaces a FreeType pass per text row per frame.
+    
+    Args:
+        font (ImageFont): PIL ImageFont object for rendering
+        chars (str): Sorted character string (dark to light)
+        char_w (int): Character width in pixels
+        char_h (int): Character height in pixels
+        
+    Returns:
+        numpy.ndarray: uint8 array of shape (len(chars), char_h, char_w)
+    """
+    left, top = font.getbbox("W")[:2]
+    tiles = np.zeros((len(chars), char_h, char_w), dtype=np.uint8)
+    for i, char in enumerate(chars):
+        tile = Image.new('L', (char_w, char_h), color=0)
+        ImageDraw.Draw(tile).text((-left, -top), char, font=font, fill=255)
+        tiles[i] = np.asarray(tile)
+    return tiles
 
 
 def render_ascii_frame(ascii_lines, font, char_w, char_h):
@@ -144,7 +258,8 @@ def render_ascii_frame(ascii_lines, font, char_w, char_h):
     Render ASCII text lines to a 2048x2048 PNG image.
     
     Creates a black background image and renders white ASCII text
-    centered on the canvas. Used for dome projection output.
+    centered on the canvas. Used for dome projection output. Glyph tiles
+    are cached per character, so repeated calls only composite them.
     
     Args:
         ascii_lines (list): List of ASCII strings (one per row)
@@ -153,20 +268,70 @@ def render_ascii_frame(ascii_lines, font, char_w, char_h):
         char_h (int): Character height in pixels
         
     Returns:
-        PIL.Image: 2048x2048 RGB image with ASCII text rendered in white
+        PIL.Image: 2048x2048 grayscale (L) image with ASCII text rendered in white
     """
-    img = Image.new('RGB', (OUTPUT_SIZE, OUTPUT_SIZE), color=(0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    # Index every cell by code point and composite cached glyph tiles for the
+    # characters that actually occur
+    codes = np.frombuffer(''.join(ascii_lines).encode('utf-32-le'), dtype=np.uint32)
+    unique_codes, char_idx = np.unique(codes, return_inverse=True)
+    glyph_tiles = np.stack([_glyph_tile(font, chr(code), char_w, char_h) for code in unique_codes])
+    return render_glyph_frame(char_idx.reshape(len(ascii_lines), -1), glyph_tiles)
+
 
-    text_width = len(ascii_lines[0]) * char_w
-    text_height = len(ascii_lines) * char_h
-    x_offset = (OUTPUT_SIZE - text_width) // 2
-    y_offset = (OUTPUT_SIZE - text_height) // 2
+@functools.lru_cache(maxsize=1024)
+def _glyph_tile(font, char, char_w, char_h):
+    """Rasterize a single glyph tile for render_ascii_frame, cached per font and character."""
+    return build_glyph_tiles(font, char, char_w, char_h)[0]
 
-    for i, line in enumerate(ascii_lines):
-        draw.text((x_offset, y_offset + i * char_h), line, font=font, fill=(255, 255, 255))
 
-    return img
+def render_glyph_frame(char_idx, glyph_tiles, out=None):
+    """
+    Composite pre-rasterized glyph tiles into a 2048x2048 image.
+    
+    Args:
+        char_idx (numpy.ndarray): Character indices of shape (rows, cols)
+        glyph_tiles (numpy.ndarray): Tiles from build_glyph_tiles
+        out (numpy.ndarray): Reusable zeroed 2048x2048 uint8 canvas
+            (default: allocate a new canvas)
+        
+    Returns:
+        PIL.Image: 2048x2048 grayscale (L) image with ASCII text rendered in white
+    """
+    # White-on-black needs one channel; ffmpeg converts gray frames to yuv420p like RGB ones
+    return Image.fromarray(paint_glyph_canvas(char_idx, glyph_tiles, out), 'L')
+
+
+def paint_glyph_canvas(char_idx, glyph_tiles, out=None):
+    """
+    Composite pre-rasterized glyph tiles into a 2048x2048 grayscale array.
+    
+    Tiles are regrouped into a (char_h, num_chars, char_w) table of glyph
+    scanlines, and each text row is filled with one gather from it straight
+    into its stripe of the centered text area: every output scanline is
+    written as back-to-back char_w-byte runs, with no intermediate block.
+    
+    Args:
+        char_idx (numpy.ndarray): Character indices of shape (rows, cols)
+        glyph_tiles (numpy.ndarray): Tiles from build_glyph_tiles
+        out (numpy.ndarray): Reusable zeroed 2048x2048 uint8 canvas; only the
+            text area is overwritten (default: allocate a new canvas)
+        
+    Returns:
+        numpy.ndarray: 2048x2048 uint8 array with ASCII text in white
+    """
+    rows, cols = char_idx.shape
+    _, char_h, char_w = glyph_tiles.shape
+    text_h, text_w = rows * char_h, cols * char_w
+
+    # The text area is fully rewritten each frame, so a reused canvas keeps its black border
+    canvas = np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8) if out is None else out
+    y_offset = (OUTPUT_SIZE - text_h) // 2
+    x_offset = (OUTPUT_SIZE - text_w) // 2
+    cells = canvas[y_offset:y_offset + text_h, x_offset:x_offset + text_w].reshape(rows, char_h, cols, char_w)
+    glyph_rows = np.ascontiguousarray(glyph_tiles.transpose(1, 0, 2))
+    for r in range(rows):
+        np.take(glyph_rows, char_idx[r], axis=1, out=cells[r], mode='clip')
+    return canvas
 
 
 def find_images(input_path):
@@ -174,8 +339,8 @@ def find_images(input_path):
     Find all PNG/JPG images from path (file or directory).
     
     If input_path is a file, searches the same directory for all images.
-    If input_path is a directory, searches recursively for all images.
-    Supports .png, .PNG, .jpg, .JPG, .jpeg, .JPEG extensions.
+    If input_path is a directory, searches it for all images.
+    Supports .png, .jpg and .jpeg extensions in any letter case.
     
     Args:
         input_path (str): File path or directory path
@@ -184,21 +349,51 @@ def find_images(input_path):
         list: Sorted list of image file paths
     """
     if os.path.isfile(input_path):
-        # Single file - find pattern
+        # Single file - search its directory
         directory = os.path.dirname(input_path) or '.'
-        patterns = ['*.png', '*.PNG', '*.jpg', '*.JPG', '*.jpeg', '*.JPEG']
-        files = []
-        for p in patterns:
-            files.extend(glob.glob(os.path.join(directory, p)))
-        return sorted(set(files))
     elif os.path.isdir(input_path):
         # Directory - find all images
-        patterns = ['*.png', '*.PNG', '*.jpg', '*.JPG', '*.jpeg', '*.JPEG']
-        files = []
-        for p in patterns:
-            files.extend(glob.glob(os.path.join(input_path, p)))
-        return sorted(set(files))
-    return []
+        directory = input_path
+    else:
+        return []
+    # One directory listing instead of a glob per extension; extensions match
+    # case-insensitively and hidden files are skipped, as glob did
+    with os.scandir(directory) as entries:
+        files = [entry.path for entry in entries
+                 if not entry.name.startswith('.')
+                 and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                 and entry.is_file()]
+    return sorted(files)
+
+
+def _init_frame_worker(index_lut, glyph_tiles, cols, rows):
+    """
+    Set up a worker process to decode frames and paint runs with render_run.
+    
+    Args:
+        index_lut (list): Table from build_index_lut as a list
+        glyph_tiles (numpy.ndarray): Tiles from build_glyph_tiles
+        cols (int): Number of character columns (width)
+        rows (int): Number of character rows (height)
+    """
+    init_worker_state(paint_glyph_canvas, glyph_tiles, index_lut=index_lut, cols=cols, rows=rows)
+
+
+def _load_indices(img_path):
+    """
+    Decode one image and map it to a grid of character indices.
+    
+    Args:
+        img_path (str): Input image path
+        
+    Returns:
+        numpy.ndarray: Character indices of shape (rows, cols)
+    """
+    state = worker_state
+    pil_image = Image.open(img_path)
+    # JPEGs decode straight to grayscale at a reduced DCT scale; no-op for PNG
+    pil_image.draft('L', (state['cols'], state['rows']))
+    return frame_to_indices(pil_image, state['index_lut'], state['cols'], state['rows'])
 
 
 def main():
@@ -219,6 +414,8 @@ def main():
         --skip-video: Skip video creation, only create PNG frames (flag)
         --fps: FPS for video creation (default: 30)
         --preview: Process only first 30 frames (flag)
+        --stream: Pipe ASCII frames straight to ffmpeg, no PNG frames (flag)
+        --workers: Worker processes for conversion (default: CPU count)
         
     Output:
         Creates directory with frame_000000.png, frame_000001.png, etc.
@@ -235,6 +432,8 @@ def main():
     parser.add_argument('--skip-video', action='store_true', help='Skip video creation, only create PNG frames')
     parser.add_argument('--fps', type=int, default=30, help='FPS for video creation (default: 30)')
     parser.add_argument('--preview', action='store_true', help='Process only first 30 frames')
+    parser.add_argument('--stream', action='store_true', help='Pipe ASCII frames straight to ffmpeg instead of writing PNG frames')
+    parser.add_argument('--workers', type=int, help='Worker processes for conversion (default: CPU count)')
     args = parser.parse_args()
 
     chars = load_characters(args.chars)
@@ -253,6 +452,11 @@ def main():
     rows = OUTPUT_SIZE // char_h
     print(f"Grid: {cols}x{rows} characters")
 
+    # Brightness -> character table and glyph tiles are the same for every frame
+    # (as a list, which Image.point takes directly)
+    index_lut = build_index_lut(chars).tolist()
+    glyph_tiles = build_glyph_tiles(font, chars, char_w, char_h)
+
     images = find_images(args.input)
     if not images:
         print(f"Error: No images found in {args.input}")
@@ -265,20 +469,6 @@ def main():
 
     os.makedirs(args.output, exist_ok=True)
 
-    for i, img_path in enumerate(images):
-        pil_image = Image.open(img_path)
-        ascii_lines = frame_to_ascii(pil_image, chars, cols, rows)
-        img = render_ascii_frame(ascii_lines, font, char_w, char_h)
-
-        output_path = os.path.join(args.output, f'frame_{i:06d}.png')
-        img.save(output_path, 'PNG')
-
-        if (i + 1) % 10 == 0:
-            print(f"  {i + 1}/{len(images)} frames")
-
-    print(f"\nDone. {len(images)} frames saved to '{args.output}/'")
-    
-    # Automatically create video from frames
     if not args.skip_video:
         # Generate output video filename
         if args.video_output:
@@ -295,7 +485,66 @@ def main():
                 video_output = input_path.stem + '_ascii.mp4'
             # Save in same directory as output frames, or current directory
             video_output = os.path.join(args.output, video_output)
-        
+
+    # Optionally pipe frames straight into ffmpeg instead of writing PNGs
+    video_stream = None
+    if args.stream and not args.skip_video:
+        print(f"\nStreaming frames to ffmpeg: {video_output}")
+        video_stream = open_video_stream(video_output, args.fps)
+
+    if video_stream:
+        # Frames go straight to the encoder; no PNGs are written
+        output_paths = [None] * len(images)
+    else:
+        output_template = os.path.join(args.output, 'frame_{:06d}.png')
+        output_paths = [output_template.format(i) for i in range(len(images))]
+    workers = args.workers or os.cpu_count()
+    if workers > 1:
+        print(f"Using {workers} worker processes")
+
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            # Frames are independent, so convert them in parallel. The table and tiles
+            # are handed to each worker once instead of pickled with every frame; the
+            # tiles are only a few tens of KB, so copying beats a shared memory segment
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_frame_worker,
+                initargs=(index_lut, glyph_tiles, cols, rows)))
+            # Decode in the pool too; only the small index grids come back here to be
+            # checked for repeats before the runs are painted
+            indices = map_bounded(executor, _load_indices, images, window=workers * 2)
+            runs = group_repeats(indices, output_paths)
+            frames = map_bounded(executor, render_run, runs, window=workers * 2)
+        else:
+            # Single process: decode the next few images on threads while this one
+            # paints and encodes; PIL releases the GIL while decoding
+            _init_frame_worker(index_lut, glyph_tiles, cols, rows)
+            loader = stack.enter_context(ThreadPoolExecutor(max_workers=PREFETCH_THREADS))
+            indices = map_bounded(loader, _load_indices, images, window=PREFETCH_THREADS * 2)
+            frames = map(render_run, group_repeats(indices, output_paths))
+
+        try:
+            done = 0
+            for frame, count in frames:
+                if frame is not None:
+                    for _ in range(count):
+                        video_stream.stdin.write(frame)
+                if (done + count) // 10 > done // 10:
+                    print(f"  {done + count}/{len(images)} frames")
+                done += count
+        except BrokenPipeError:
+            print("Error: ffmpeg stopped accepting frames")
+
+    if video_stream:
+        print(f"\nDone. {len(images)} frames streamed to ffmpeg")
+    else:
+        print(f"\nDone. {len(images)} frames saved to '{args.output}/'")
+    
+    # Automatically create video from frames
+    if video_stream:
+        close_video_stream(video_stream, video_output)
+    elif not args.skip_video:
         print(f"\nCreating video: {video_output}")
         
         # Check if ffmpeg is available
@@ -21,11 +21,13 @@ Input formats:
 
 Dependencies:
     - Pillow (PIL)
+    - NumPy
     - json (standard library)
 """
 
 import json
 import argparse
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
 FONTS = {
@@ -34,6 +36,31 @@ FONTS = {
     "monaco": "/System/Library/Fonts/Monaco.ttf",
 }
 
+# Brightness per (char, font_path, font_size, font_index), kept across calls
+_BRIGHTNESS_CACHE = {}
+
+
+def render_char_cell(char, font, size=50):
+    """
+    Render a character centered on a black size x size grayscale cell.
+    
+    The 'mm' anchor centers the glyph on its advance width and line height.
+    Pillow resolves the anchor in the same layout pass that rasterizes the
+    glyph, so each character is laid out once. Ink that extends past the
+    cell is clipped.
+    
+    Args:
+        char (str): Single character to render
+        font (ImageFont): PIL ImageFont object for rendering
+        size (int): Cell size in pixels (default: 50)
+        
+    Returns:
+        PIL.Image: size x size grayscale (L) image with the character in white
+    """
+    cell = Image.new('L', (size, size), 0)
+    ImageDraw.Draw(cell).text((size / 2, size / 2), char, fill=255, font=font, anchor='mm')
+    return cell
+
 
 def get_char_brightness(char, font, size=50):
     """
@@ -50,20 +77,36 @@ def get_char_brightness(char, font, size=50):
     Returns:
         float: Average brightness value (0.0 = black, 255.0 = white)
     """
-    img = Image.new('L', (size, size), color=0)
-    draw = ImageDraw.Draw(img)
-
-    bbox = draw.textbbox((0, 0), char, font=font)
-    char_width = bbox[2] - bbox[0]
-    char_height = bbox[3] - bbox[1]
+    return float(np.asarray(render_char_cell(char, font, size), dtype=np.uint8).mean())
 
-    x = (size - char_width) // 2 - bbox[0]
-    y = (size - char_height) // 2 - bbox[1]
 
-    draw.text((x, y), char, font=font, fill=255)
-
-    pixels = list(img.getdata())
-    return sum(pixels) / len(pixels)
+def measure_chars_brightness(chars, font, size=50, grid_cols=16):
+    """
+    Render many characters into one grid image and return their brightness.
+    
+    Each character is rendered into its own clipped size x size cell exactly
+    as in get_char_brightness, and the cells are pasted into one grid image so
+    the per-cell averages come from a single vectorized reduction.
+    
+    Args:
+        chars (list): Characters to measure
+        font (ImageFont): PIL ImageFont object for rendering
+        size (int): Cell size for rendering each character (default: 50)
+        grid_cols (int): Number of cells per grid row (default: 16)
+        
+    Returns:
+        numpy.ndarray: Average brightness per character, in input order
+    """
+    if not chars:
+        return np.zeros(0)
+    cols = min(grid_cols, len(chars))
+    rows = -(-len(chars) // cols)
+    grid = Image.new('L', (cols * size, rows * size), color=0)
+    for i, char in enumerate(chars):
+        row, col = divmod(i, cols)
+        grid.paste(render_char_cell(char, font, size), (col * size, row * size))
+    cells = np.asarray(grid, dtype=np.uint8).reshape(rows, size, cols, size)
+    return cells.mean(axis=(1, 3)).ravel()[:len(chars)]
 
 
 def load_characters(file_path):
@@ -115,7 +158,10 @@ def sort_by_brightness(chars, font):
     
     Measures the brightness of each character when rendered with the given font
     and sorts them from darkest (lowest brightness) to brightest (highest brightness).
-    Prints brightness values for each character during processing.
+    Measurements are cached per (char, font path, font size), so repeated
+    calls only render characters not seen before. Uncached characters are
+    measured together in a single grid render. Prints brightness values for
+    each character once sorting is done.
     
     Args:
         chars (list): List of characters to sort
@@ -124,13 +170,15 @@ def sort_by_brightness(chars, font):
     Returns:
         list: Characters sorted from darkest to brightest
     """
-    char_brightness = []
-    for char in chars:
-        brightness = get_char_brightness(char, font)
-        char_brightness.append((char, brightness))
-        print(f"  '{char}': {brightness:.2f}")
+    font_key = (font.path, font.size, font.index)
+    missing = [c for c in dict.fromkeys(chars) if (c,) + font_key not in _BRIGHTNESS_CACHE]
+    for char, brightness in zip(missing, measure_chars_brightness(missing, font)):
+        _BRIGHTNESS_CACHE[(char,) + font_key] = float(brightness)
 
+    char_brightness = [(char, _BRIGHTNESS_CACHE[(char,) + font_key]) for char in chars]
     char_brightness.sort(key=lambda x: x[1])
+    for char, brightness in char_brightness:
+        print(f"  '{char}': {brightness:.2f}")
     return [c[0] for c in char_brightness]
 
 
@@ -154,7 +202,7 @@ def main():
         - count: Number of characters
         
     Note:
-        Prints brightness values for each character during sorting process.
+        Prints brightness values for each character after sorting.
     """
     parser = argparse.ArgumentParser(description='Sort characters by brightness')
     parser.add_argument('input', help='Input JSON or TXT file')
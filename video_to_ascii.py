@@ -18,18 +18,25 @@ Usage:
 Dependencies:
     - opencv-python (cv2)
     - Pillow (PIL)
+    - NumPy
     - json (standard library)
 """
 
 import cv2
 import json
 import argparse
+import contextlib
+import functools
+import itertools
 import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from frame_pipeline import (OUTPUT_SIZE, close_video_stream, group_repeats, init_worker_state,
+                            map_bounded, open_video_stream, render_run)
 
-OUTPUT_SIZE = 2048
 
 FONT_DIR = "/Users/adelinesetiawan/ASCII-dome/fonts"
 FONTS = {
@@ -102,70 +109,153 @@ def load_font(font_path, size):
     return ImageFont.truetype(font_path, size)
 
 
-def frame_to_ascii(pil_image, chars, cols, rows):
+@functools.lru_cache(maxsize=8)
+def build_index_lut(chars):
     """
-    Convert a PIL image to ASCII art lines.
+    Build a 256-entry lookup table mapping pixel brightness to a character index.
     
-    Converts image to grayscale, resizes to specified dimensions,
-    and maps each pixel's brightness to a character from the sorted
-    character set (darkest pixel = first char, brightest = last char).
+    Equivalent to min(int(pixel / 256 * len(chars)), len(chars) - 1) for every
+    pixel value, computed once per character set instead of once per pixel.
     
     Args:
-        pil_image (PIL.Image): Input image (any color mode)
         chars (str): Sorted character string (dark to light)
-        cols (int): Number of character columns (width)
-        rows (int): Number of character rows (height)
         
     Returns:
-        list: List of strings, each string is one row of ASCII characters
+        numpy.ndarray: Character indices indexed by pixel value (0-255)
     """
-    gray = pil_image.convert("L")
-    resized = gray.resize((cols, rows), Image.Resampling.LANCZOS)
-    pixels = list(resized.getdata())
-
     num_chars = len(chars)
-    ascii_lines = []
+    lut = np.minimum((np.arange(256) * num_chars) >> 8, num_chars - 1)
+    # uint8 indices whenever they fit, so index grids are 8x smaller to gather
+    # and to hand to worker processes
+    return lut.astype(np.uint8) if num_chars <= 256 else lut
 
-    for row in range(rows):
-        line = ""
-        for col in range(cols):
-            pixel = pixels[row * cols + col]
-            idx = int(pixel / 256 * num_chars)
-            idx = min(idx, num_chars - 1)
-            line += chars[idx]
-        ascii_lines.append(line)
 
-    return ascii_lines
+def video_frame_to_indices(frame, index_lut, cols, rows):
+    """
+    Convert a BGR video frame from OpenCV to a grid of character indices.
+    
+    Works on the decoded ndarray directly: one cvtColor to grayscale, one
+    area-average resize and one table lookup, with no round trip through PIL.
+    
+    Args:
+        frame (numpy.ndarray): BGR frame from cv2.VideoCapture.read
+        index_lut (numpy.ndarray): Table from build_index_lut
+        cols (int): Number of character columns (width)
+        rows (int): Number of character rows (height)
+        
+    Returns:
+        numpy.ndarray: Character indices of shape (rows, cols)
+    """
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (cols, rows), interpolation=cv2.INTER_AREA)
+    if index_lut.dtype == np.uint8:
+        # 256-entry table lookup in one C pass
+        return cv2.LUT(small, index_lut)
+    return index_lut[small]
 
 
-def render_ascii_frame(ascii_lines, font, char_w, char_h):
+def build_glyph_tiles(font, chars, char_w, char_h):
     """
-    Render ASCII text lines to a 2048x2048 PNG image.
+    Pre-rasterize every character into a fixed-size grayscale tile.
     
-    Creates a black background image and renders white ASCII text
-    centered on the canvas. Used for dome projection output.
+    Glyphs are aligned to the 'W' bounding box used by get_font_metrics, so
+    each tile covers exactly one char_w x char_h cell of the output grid.
+    Rendering once up front replaces a FreeType pass per text row per frame.
     
     Args:
-        ascii_lines (list): List of ASCII strings (one per row)
         font (ImageFont): PIL ImageFont object for rendering
+        chars (str): Sorted character string (dark to light)
         char_w (int): Character width in pixels
         char_h (int): Character height in pixels
         
     Returns:
-        PIL.Image: 2048x2048 RGB image with ASCII text rendered in white
+        numpy.ndarray: uint8 array of shape (len(chars), char_h, char_w)
+    """
+    left, top = font.getbbox("W")[:2]
+    tiles = np.zeros((len(chars), char_h, char_w), dtype=np.uint8)
+    for i, char in enumerate(chars):
+        tile = Image.new('L', (char_w, char_h), color=0)
+        ImageDraw.Draw(tile).text((-left, -top), char, font=font, fill=255)
+        tiles[i] = np.asarray(tile)
+    return tiles
+
+
+def paint_glyph_canvas(char_idx, glyph_tiles, out=None):
+    """
+    Composite pre-rasterized glyph tiles into a 2048x2048 grayscale array.
+    
+    Tiles are regrouped into a (char_h, num_chars, char_w) table of glyph
+    scanlines, and each text row is filled with one gather from it straight
+    into its stripe of the centered text area: every output scanline is
+    written as back-to-back char_w-byte runs, with no intermediate block.
+    
+    Args:
+        char_idx (numpy.ndarray): Character indices of shape (rows, cols)
+        glyph_tiles (numpy.ndarray): Tiles from build_glyph_tiles
+        out (numpy.ndarray): Reusable zeroed 2048x2048 uint8 canvas; only the
+            text area is overwritten (default: allocate a new canvas)
+        
+    Returns:
+        numpy.ndarray: 2048x2048 uint8 array with ASCII text in white
     """
-    img = Image.new('RGB', (OUTPUT_SIZE, OUTPUT_SIZE), color=(0, 0, 0))
-    draw = ImageDraw.Draw(img)
+    rows, cols = char_idx.shape
+    _, char_h, char_w = glyph_tiles.shape
+    text_h, text_w = rows * char_h, cols * char_w
+
+    # The text area is fully rewritten each frame, so a reused canvas keeps its black border
+    canvas = np.zeros((OUTPUT_SIZE, OUTPUT_SIZE), dtype=np.uint8) if out is None else out
+    y_offset = (OUTPUT_SIZE - text_h) // 2
+    x_offset = (OUTPUT_SIZE - text_w) // 2
+    cells = canvas[y_offset:y_offset + text_h, x_offset:x_offset + text_w].reshape(rows, char_h, cols, char_w)
+    glyph_rows = np.ascontiguousarray(glyph_tiles.transpose(1, 0, 2))
+    for r in range(rows):
+        np.take(glyph_rows, char_idx[r], axis=1, out=cells[r], mode='clip')
+    return canvas
+
+
+def open_video_capture(path):
+    """
+    Open a video for decoding, asking OpenCV for a hardware decoder.
 
-    text_width = len(ascii_lines[0]) * char_w
-    text_height = len(ascii_lines) * char_h
-    x_offset = (OUTPUT_SIZE - text_width) // 2
-    y_offset = (OUTPUT_SIZE - text_height) // 2
+    With the FFmpeg backend this picks up NVDEC, VAAPI or D3D11 when the
+    build and driver support them, and quietly decodes in software otherwise.
 
-    for i, line in enumerate(ascii_lines):
-        draw.text((x_offset, y_offset + i * char_h), line, font=font, fill=(255, 255, 255))
+    Args:
+        path (str): Path to the input video
 
-    return img
+    Returns:
+        cv2.VideoCapture: Capture object (check isOpened)
+    """
+    if hasattr(cv2, 'VIDEO_ACCELERATION_ANY'):
+        params = [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        cap = cv2.VideoCapture(path, cv2.CAP_ANY, params)
+        if cap.isOpened():
+            return cap
+    # OpenCV older than 4.5.2, or no backend accepted the acceleration request
+    return cv2.VideoCapture(path)
+
+
+def iter_video_indices(cap, index_lut, cols, rows, max_frames=float('inf')):
+    """
+    Read frames from an open video and yield their character index grids.
+    
+    Args:
+        cap (cv2.VideoCapture): Opened video capture
+        index_lut (numpy.ndarray): Table from build_index_lut
+        cols (int): Number of character columns (width)
+        rows (int): Number of character rows (height)
+        max_frames (float): Stop after this many frames (default: all)
+        
+    Yields:
+        numpy.ndarray: Character indices of shape (rows, cols), one per frame
+    """
+    frame_num = 0
+    while frame_num < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        yield video_frame_to_indices(frame, index_lut, cols, rows)
+        frame_num += 1
 
 
 def main():
@@ -185,6 +275,8 @@ def main():
         --video-output: Output video file path (default: auto-generated from input name)
         --skip-video: Skip video creation, only create PNG frames (flag)
         --preview: Process only first 30 frames (flag)
+        --stream: Pipe ASCII frames straight to ffmpeg, no PNG frames (flag)
+        --workers: Worker processes for conversion (default: CPU count)
         
     Output:
         Creates directory with frame_000000.png, frame_000001.png, etc.
@@ -200,6 +292,8 @@ def main():
     parser.add_argument('--video-output', help='Output video file path (default: auto-generated from input name)')
     parser.add_argument('--skip-video', action='store_true', help='Skip video creation, only create PNG frames')
     parser.add_argument('--preview', action='store_true', help='Process only first 30 frames')
+    parser.add_argument('--stream', action='store_true', help='Pipe ASCII frames straight to ffmpeg instead of writing PNG frames')
+    parser.add_argument('--workers', type=int, help='Worker processes for conversion (default: CPU count)')
     args = parser.parse_args()
 
     chars = load_characters(args.chars)
@@ -219,7 +313,11 @@ def main():
     print(f"Grid: {cols}x{rows} characters")
     print(f"Char size: {char_w}x{char_h} pixels")
 
-    cap = cv2.VideoCapture(args.input)
+    # Brightness -> character table and glyph tiles are the same for every frame
+    index_lut = build_index_lut(chars)
+    glyph_tiles = build_glyph_tiles(font, chars, char_w, char_h)
+
+    cap = open_video_capture(args.input)
     if not cap.isOpened():
         print(f"Error: Cannot open {args.input}")
         return
@@ -230,32 +328,6 @@ def main():
 
     os.makedirs(args.output, exist_ok=True)
 
-    frame_num = 0
-    max_frames = 30 if args.preview else float('inf')
-
-    print("Processing frames...")
-    while frame_num < max_frames:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(frame_rgb)
-
-        ascii_lines = frame_to_ascii(pil_image, chars, cols, rows)
-        img = render_ascii_frame(ascii_lines, font, char_w, char_h)
-
-        output_path = os.path.join(args.output, f'frame_{frame_num:06d}.png')
-        img.save(output_path, 'PNG')
-
-        frame_num += 1
-        if frame_num % 10 == 0:
-            print(f"  {frame_num}/{total_frames} frames")
-
-    cap.release()
-    print(f"\nDone. {frame_num} frames saved to '{args.output}/'")
-    
-    # Automatically create video from frames
     if not args.skip_video:
         # Generate output video filename
         if args.video_output:
@@ -266,7 +338,63 @@ def main():
             video_output = input_path.stem + '_ascii' + input_path.suffix
             # Save in same directory as output frames, or current directory
             video_output = os.path.join(args.output, video_output)
-        
+
+    # Optionally pipe frames straight into ffmpeg instead of writing PNGs
+    video_stream = None
+    if args.stream and not args.skip_video:
+        print(f"\nStreaming frames to ffmpeg: {video_output}")
+        video_stream = open_video_stream(video_output, fps)
+
+    frame_num = 0
+    max_frames = 30 if args.preview else float('inf')
+    workers = args.workers or os.cpu_count()
+    if workers > 1:
+        print(f"Using {workers} worker processes")
+
+    print("Processing frames...")
+    # Decoding stays in this process, which only hands each worker a small grid of
+    # character indices; painting and PNG encoding run in parallel. Runs of frames
+    # with identical grids are painted and encoded once
+    indices = iter_video_indices(cap, index_lut, cols, rows, max_frames)
+    if video_stream:
+        # Frames go straight to the encoder; no PNGs are written
+        output_paths = itertools.repeat(None)
+    else:
+        output_template = os.path.join(args.output, 'frame_{:06d}.png')
+        output_paths = map(output_template.format, itertools.count())
+    runs = group_repeats(indices, output_paths)
+    with contextlib.ExitStack() as stack:
+        if workers > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=init_worker_state,
+                initargs=(paint_glyph_canvas, glyph_tiles)))
+            frames = map_bounded(executor, render_run, runs, window=workers * 2)
+        else:
+            init_worker_state(paint_glyph_canvas, glyph_tiles)
+            frames = map(render_run, runs)
+
+        try:
+            for frame, count in frames:
+                if frame is not None:
+                    for _ in range(count):
+                        video_stream.stdin.write(frame)
+                if (frame_num + count) // 10 > frame_num // 10:
+                    print(f"  {frame_num + count}/{total_frames} frames")
+                frame_num += count
+        except BrokenPipeError:
+            print("Error: ffmpeg stopped accepting frames")
+
+    cap.release()
+    if video_stream:
+        print(f"\nDone. {frame_num} frames streamed to ffmpeg")
+    else:
+        print(f"\nDone. {frame_num} frames saved to '{args.output}/'")
+    
+    # Automatically create video from frames
+    if video_stream:
+        close_video_stream(video_stream, video_output)
+    elif not args.skip_video:
         print(f"\nCreating video: {video_output}")
         
         # Check if ffmpeg is available